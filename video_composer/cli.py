@@ -8,7 +8,9 @@ from video_composer.meta import DEFAULT_LIMIT, ClipMetas, Size
 from video_composer.video import (
     DEFAULT_FPS, DEFAULT_INTERTITLE_COLOR, DEFAULT_INTERTITLE_DURATION,
     DEFAULT_INTERTITLE_FONT, DEFAULT_INTERTITLE_FONTSIZE,
-    DEFAULT_INTERTITLE_POSITION, DEFAULT_SUFFIX, Composition,
+    DEFAULT_INTERTITLE_POSITION, DEFAULT_JOIN_FORMAT, DEFAULT_SEGMENT_DURATION,
+    DEFAULT_SUFFIX, JOIN_FORMAT_FILE, JOIN_FORMAT_FMP4, JOIN_FORMAT_HLS,
+    JOIN_FORMAT_SUFFIXES, JOIN_FORMATS, SEGMENTED_CODEC, Composition,
 )
 
 logger = logging.getLogger(__name__)
@@ -80,6 +82,33 @@ def main():
         ),
     )
 
+    join_group = parser.add_argument_group('joined output')
+    join_group.add_argument(
+        '-jf',
+        '--join-format',
+        choices=JOIN_FORMATS,
+        default=DEFAULT_JOIN_FORMAT,
+        help=(
+            'Format of the joined video; '
+            'file: regular video file, '
+            'fmp4: fragmented MP4 that can be played while it is being '
+            'written, '
+            'hls: HLS playlist with MPEG-TS segments written next to it; '
+            f'defaults to {DEFAULT_JOIN_FORMAT}'
+        ),
+    )
+    join_group.add_argument(
+        '-sd',
+        '--segment-duration',
+        type=float,
+        help=(
+            'Maximum duration of fmp4 fragments and hls segments in seconds; '
+            'each clip always starts a new segment; '
+            f'defaults to {DEFAULT_SEGMENT_DURATION}, '
+            '0 means one segment per clip'
+        ),
+    )
+
     video_group = parser.add_argument_group('video format')
     video_group.add_argument(
         '-vf',
@@ -256,6 +285,31 @@ def main():
                 'time. Or use the new option --resize WIDTHxHEIGHT'
             )
 
+    if args.join_format != DEFAULT_JOIN_FORMAT:
+        if not args.output_file:
+            parser.error(f'Join format {args.join_format} requires --join')
+        join_suffix = JOIN_FORMAT_SUFFIXES[args.join_format]
+        if args.output_file.suffix != join_suffix:
+            parser.error(
+                f'Join format {args.join_format} requires the --join file '
+                f'to have the extension {join_suffix}'
+            )
+        if args.video_codec and args.video_codec != SEGMENTED_CODEC:
+            parser.error(
+                f'Join format {args.join_format} supports only the video '
+                f'codec {SEGMENTED_CODEC}'
+            )
+    if args.segment_duration is not None:
+        if args.join_format == JOIN_FORMAT_FILE:
+            parser.error(
+                'Option --segment-duration requires --join-format '
+                f'{JOIN_FORMAT_FMP4} or {JOIN_FORMAT_HLS}'
+            )
+        if args.segment_duration < 0:
+            parser.error('Option --segment-duration must not be negative')
+    else:
+        args.segment_duration = DEFAULT_SEGMENT_DURATION
+
     metas = ClipMetas.from_csv(args.csv, limit=args.limit)
     if args.clips:
         metas.add_base_path(args.clips)
@@ -269,6 +323,8 @@ def main():
         if args.ffmpeg_params
         else (),
         tags=['i'] if args.intertitles else [],
+        join_format=args.join_format,
+        segment_duration=args.segment_duration,
     )
 
     for clip in composition.clips:
@@ -0,0 +1,204 @@
+import copy
+from typing import Callable, Optional
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None  # type: ignore
+
+GetFrame = Callable[[float], np.ndarray]
+
+
+class Transform:
+    """One step of a FramePipeline.
+
+    A transform can change the time at which the previous step is sampled
+    (get_time), the duration and the size of the clip and the pixels of each
+    frame (apply). apply receives a flag telling whether the frame is owned by
+    the pipeline and can therefore be modified in place.
+    """
+
+    applies_to_mask = True
+
+    def __init__(self):
+        self._buffers: dict[tuple, np.ndarray] = {}
+
+    def _get_buffer(self, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        key = (shape, np.dtype(dtype).str)
+        if key not in self._buffers:
+            self._buffers[key] = np.empty(shape, dtype=dtype)
+        return self._buffers[key]
+
+    def copy(self) -> 'Transform':
+        """Return a copy of the transform with its own buffers."""
+        transform = copy.copy(self)
+        transform._buffers = {}
+        return transform
+
+    def get_time(self, t):
+        return t
+
+    def get_duration(self, duration: float) -> float:
+        return duration
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return size
+
+    def apply(
+        self, frame: np.ndarray, t: float, writable: bool
+    ) -> tuple[np.ndarray, bool]:
+        return frame, writable
+
+
+class Crop(Transform):
+    def __init__(self, x1: int, y1: int, width: int, height: int):
+        super().__init__()
+        self.x1 = x1
+        self.y1 = y1
+        self.width = width
+        self.height = height
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return self.width, self.height
+
+    def apply(
+        self, frame: np.ndarray, t: float, writable: bool
+    ) -> tuple[np.ndarray, bool]:
+        x2 = self.x1 + self.width
+        y2 = self.y1 + self.height
+        return frame[self.y1:y2, self.x1:x2], writable
+
+
+class Resize(Transform):
+    """Resize frames into a reused buffer.
+
+    Writing into the buffer requires OpenCV. Without it, MoviePy's resizer is
+    used, which allocates a new frame on every call.
+    """
+
+    def __init__(self, width: int, height: int):
+        super().__init__()
+        self.width = width
+        self.height = height
+
+    def get_size(self, size: tuple[int, int]) -> tuple[int, int]:
+        return self.width, self.height
+
+    def apply(
+        self, frame: np.ndarray, t: float, writable: bool
+    ) -> tuple[np.ndarray, bool]:
+        if cv2 is None:
+            from moviepy.video.fx.resize import resizer
+
+            return resizer(frame, (self.width, self.height)), True
+        buffer = self._get_buffer(
+            (self.height, self.width, *frame.shape[2:]), frame.dtype
+        )
+        if self.width > frame.shape[1] or self.height > frame.shape[0]:
+            interpolation = cv2.INTER_LINEAR
+        else:
+            interpolation = cv2.INTER_AREA
+        cv2.resize(
+            frame,
+            (self.width, self.height),
+            dst=buffer,
+            interpolation=interpolation,
+        )
+        return buffer, True
+
+
+class Speed(Transform):
+    def __init__(self, factor: float):
+        super().__init__()
+        self.factor = factor
+
+    def get_time(self, t):
+        return t * self.factor
+
+    def get_duration(self, duration: float) -> float:
+        return duration / self.factor
+
+
+class FadeOut(Transform):
+    """Fade to black during the last `duration` seconds before `end`."""
+
+    applies_to_mask = False
+
+    def __init__(self, end: float, duration: float):
+        super().__init__()
+        self.end = end
+        self.duration = duration
+
+    def apply(
+        self, frame: np.ndarray, t: float, writable: bool
+    ) -> tuple[np.ndarray, bool]:
+        factor = (self.end - t) / self.duration
+        if factor >= 1:
+            return frame, writable
+        if not writable:
+            buffer = self._get_buffer(frame.shape, frame.dtype)
+            np.copyto(buffer, frame)
+            frame = buffer
+        np.multiply(
+            frame, np.float32(max(factor, 0)), out=frame, casting='unsafe'
+        )
+        return frame, True
+
+
+class FramePipeline:
+    """Chain of transforms applied to each frame in a single pass.
+
+    Unlike chained MoviePy effects, the pipeline doesn't allocate a new frame
+    for every transform: crops are views, resizes and fades write into buffers
+    that are reused for every frame. The returned frame is therefore only
+    valid until the next call of get_frame.
+    """
+
+    def __init__(
+        self,
+        get_frame: GetFrame,
+        duration: float,
+        size: tuple[int, int],
+        transforms: Optional[list[Transform]] = None,
+    ):
+        self._get_frame = get_frame
+        self._source_duration = duration
+        self._source_size = size
+        self.transforms: list[Transform] = []
+        self.duration = duration
+        self.size = size
+        for transform in transforms or []:
+            self.add(transform)
+
+    def add(self, transform: Transform):
+        self.transforms.append(transform)
+        self.duration = transform.get_duration(self.duration)
+        self.size = transform.get_size(self.size)
+
+    def get_time(self, t):
+        for transform in reversed(self.transforms):
+            t = transform.get_time(t)
+        return t
+
+    def get_frame(self, t: float) -> np.ndarray:
+        times = []
+        for transform in reversed(self.transforms):
+            times.append(t)
+            t = transform.get_time(t)
+        frame = self._get_frame(t)
+        writable = False
+        for transform, t in zip(self.transforms, reversed(times)):
+            frame, writable = transform.apply(frame, t, writable)
+        return frame
+
+    def for_mask(self, get_frame: GetFrame) -> 'FramePipeline':
+        return FramePipeline(
+            get_frame,
+            duration=self._source_duration,
+            size=self._source_size,
+            transforms=[
+                t.copy() for t in self.transforms if t.applies_to_mask
+            ],
+        )
@@ -0,0 +1,86 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from video_composer.frames import Crop, FadeOut, FramePipeline, Resize, Speed
+
+
+def make_frames(n: int = 10, width: int = 8, height: int = 6) -> np.ndarray:
+    pixels = np.arange(n * height * width * 3) % 256
+    return pixels.reshape((n, height, width, 3)).astype(np.uint8)
+
+
+class TestFramePipeline(TestCase):
+    def setUp(self):
+        self.frames = make_frames()
+        self.frames.setflags(write=False)
+        self.requested_times = []
+
+        def get_frame(t: float) -> np.ndarray:
+            self.requested_times.append(t)
+            return self.frames[int(t)]
+
+        self.pipeline = FramePipeline(get_frame, duration=10, size=(8, 6))
+
+    def test_crop_is_view(self):
+        self.pipeline.add(Crop(x1=2, y1=1, width=4, height=3))
+        frame = self.pipeline.get_frame(5)
+        self.assertEqual(self.pipeline.size, (4, 3))
+        np.testing.assert_array_equal(frame, self.frames[5, 1:4, 2:6])
+        self.assertTrue(np.shares_memory(frame, self.frames))
+
+    def test_resize_reuses_buffer(self):
+        self.pipeline.add(Resize(width=4, height=3))
+        first = self.pipeline.get_frame(1)
+        second = self.pipeline.get_frame(2)
+        self.assertEqual(first.shape, (3, 4, 3))
+        self.assertIs(first, second)
+
+    def test_resize_without_opencv(self):
+        self.pipeline.add(Resize(width=4, height=3))
+        with patch('video_composer.frames.cv2', None):
+            first = self.pipeline.get_frame(1)
+            second = self.pipeline.get_frame(1)
+        self.assertEqual(first.shape, (3, 4, 3))
+        np.testing.assert_array_equal(first, second)
+        self.assertIsNot(first, second)
+
+    def test_speed(self):
+        self.pipeline.add(Speed(factor=2))
+        self.pipeline.get_frame(3)
+        self.assertEqual(self.pipeline.duration, 5)
+        self.assertEqual(self.requested_times, [6])
+
+    def test_fadeout(self):
+        self.pipeline.add(FadeOut(end=10, duration=4))
+        np.testing.assert_array_equal(
+            self.pipeline.get_frame(5), self.frames[5]
+        )
+        frame = self.pipeline.get_frame(8)
+        np.testing.assert_array_equal(frame, self.frames[8] // 2)
+        self.assertFalse(np.shares_memory(frame, self.frames))
+
+    def test_fadeout_after_speed_uses_its_own_timeline(self):
+        self.pipeline.add(Speed(factor=2))
+        self.pipeline.add(FadeOut(end=5, duration=2))
+        frame = self.pipeline.get_frame(4)
+        np.testing.assert_array_equal(frame, self.frames[8] // 2)
+
+    def test_for_mask_skips_fadeout(self):
+        masks = np.ones((10, 6, 8))
+        self.pipeline.add(Crop(x1=0, y1=0, width=4, height=3))
+        self.pipeline.add(FadeOut(end=10, duration=4))
+        mask_pipeline = self.pipeline.for_mask(lambda t: masks[int(t)])
+        mask = mask_pipeline.get_frame(9)
+        self.assertEqual(mask_pipeline.size, (4, 3))
+        np.testing.assert_array_equal(mask, np.ones((3, 4)))
+
+    def test_for_mask_has_own_buffers(self):
+        masks = make_frames()[::-1].copy()
+        self.pipeline.add(Resize(width=4, height=3))
+        mask_pipeline = self.pipeline.for_mask(lambda t: masks[int(t)])
+        frame = self.pipeline.get_frame(2)
+        expected = frame.copy()
+        mask_pipeline.get_frame(2)
+        np.testing.assert_array_equal(frame, expected)
@@ -0,0 +1,255 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from moviepy.editor import AudioClip, VideoClip
+
+from video_composer.frames import Crop, Resize
+from video_composer.meta import ClipMeta
+from video_composer.video import (
+    HLS_SEGMENT_TIME_MAX, JOIN_FORMAT_FILE, JOIN_FORMAT_FMP4, JOIN_FORMAT_HLS,
+    Clip, Composition, format_times, get_segment_times,
+)
+
+
+class TestGetSegmentTimes(TestCase):
+    def test_clip_boundaries(self):
+        segment_times = get_segment_times([3.7, 2.5, 4])
+        self.assertEqual(segment_times, [3.7, 6.2])
+
+    def test_split_long_clips(self):
+        segment_times = get_segment_times([3.7, 5, 2.5], segment_duration=2)
+        self.assertEqual(segment_times, [2, 3.7, 5.7, 7.7, 8.7, 10.7])
+
+    def test_no_tiny_trailing_segment(self):
+        segment_times = get_segment_times([6.01, 13], segment_duration=6)
+        self.assertEqual(segment_times, [6.01, 12.01])
+
+    def test_single_clip(self):
+        segment_times = get_segment_times([4])
+        self.assertEqual(segment_times, [])
+
+    def test_format_times(self):
+        self.assertEqual(format_times([2, 3.7]), '2.000,3.700')
+
+
+def make_video_clip(
+    duration: float, width: int = 64, height: int = 48
+) -> VideoClip:
+    video_clip = VideoClip(
+        lambda t: np.full(
+            (height, width, 3), int(t * 40) % 256, dtype=np.uint8
+        ),
+        duration=duration,
+    )
+    video_clip.fps = 10
+    return video_clip
+
+
+class ClipTestCase(TestCase):
+    def make_clip(
+        self, duration: float, width: int = 64, height: int = 48
+    ) -> Clip:
+        meta = ClipMeta(
+            path=Path(f'{duration}-{width}x{height}.mp4'),
+            start=None,
+            end=None,
+            text=None,
+        )
+        Clip._cache[meta.path] = make_video_clip(duration, width, height)
+        self.addCleanup(Clip._cache.pop, meta.path, None)
+        return Clip(meta)
+
+
+class TestClipResize(ClipTestCase):
+    def test_crop_before_resize(self):
+        clip = self.make_clip(1, width=64, height=48)
+        clip.resize(width=32, height=32)
+        assert clip._pipeline is not None
+        crop, resize = clip._pipeline.transforms
+        self.assertIsInstance(crop, Crop)
+        self.assertEqual(
+            (crop.x1, crop.y1, crop.width, crop.height), (8, 0, 48, 48)
+        )
+        self.assertIsInstance(resize, Resize)
+        self.assertEqual((resize.width, resize.height), (32, 32))
+        self.assertEqual(clip.video_file_clip.get_frame(0).shape, (32, 32, 3))
+
+    def test_resize_without_crop(self):
+        clip = self.make_clip(1, width=64, height=48)
+        clip.resize(width=32, height=24)
+        assert clip._pipeline is not None
+        (resize,) = clip._pipeline.transforms
+        self.assertIsInstance(resize, Resize)
+        self.assertEqual(clip.video_file_clip.get_frame(0).shape, (24, 32, 3))
+
+    def test_crop_within_frame(self):
+        sizes = [(20, 35), (20, 41), (23, 56), (64, 48), (97, 71), (101, 100)]
+        for width, height in sizes:
+            for target_width, target_height in sizes:
+                if (target_width, target_height) == (width, height):
+                    continue
+                clip = self.make_clip(1, width=width, height=height)
+                clip.resize(width=target_width, height=target_height)
+                assert clip._pipeline is not None
+                crop = clip._pipeline.transforms[0]
+                if not isinstance(crop, Crop):
+                    continue
+                self.assertLessEqual(crop.x1 + crop.width, width)
+                self.assertLessEqual(crop.y1 + crop.height, height)
+                self.assertEqual(
+                    clip.video_file_clip.get_frame(0).shape,
+                    (target_height, target_width, 3),
+                )
+
+
+class TestClipTransforms(ClipTestCase):
+    def setUp(self):
+        self.clip = self.make_clip(4, width=8, height=6)
+        source = self.clip.video_file_clip
+        self.audio = AudioClip(lambda t: np.sin(t), duration=4, fps=100)
+        source.audio = self.audio
+        source.mask = VideoClip(
+            lambda t: np.ones((6, 8)), ismask=True, duration=4
+        )
+        self.clip.fadeout(duration=2000)
+        self.clip.speed(factor=2)
+
+    def test_duration(self):
+        video_file_clip = self.clip.video_file_clip
+        self.assertEqual(video_file_clip.duration, 2)
+        self.assertEqual(video_file_clip.fps, 10)
+
+    def test_audio(self):
+        audio = self.clip.video_file_clip.audio
+        self.assertEqual(audio.duration, 2)
+        self.assertEqual(audio.get_frame(1.5), self.audio.get_frame(3))
+        np.testing.assert_array_equal(
+            audio.get_frame(np.array([0.5, 1])),
+            self.audio.get_frame(np.array([1, 2])),
+        )
+
+    def test_fadeout(self):
+        video_file_clip = self.clip.video_file_clip
+        self.assertEqual(video_file_clip.get_frame(0.5)[0, 0, 0], 40)
+        self.assertEqual(video_file_clip.get_frame(1.5)[0, 0, 0], 60)
+
+    def test_mask(self):
+        mask = self.clip.video_file_clip.mask
+        self.assertTrue(mask.ismask)
+        self.assertEqual(mask.duration, 2)
+        np.testing.assert_array_equal(mask.get_frame(1.9), np.ones((6, 8)))
+
+
+class TestCompositionRenderJoined(ClipTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.output_dir_path = Path(temp_dir.name)
+
+    def render_mocked(
+        self,
+        join_format: str,
+        durations: tuple[float, ...] = (12, 3),
+        **kwargs,
+    ) -> tuple:
+        composition = Composition(
+            clips=[self.make_clip(duration) for duration in durations],
+            join_format=join_format,
+            segment_duration=0,
+            **kwargs,
+        )
+        with patch.object(VideoClip, 'write_videofile') as write_videofile:
+            composition.render_joined(self.output_dir_path / 'output.m3u8')
+        write_videofile.assert_called_once()
+        return write_videofile.call_args
+
+    def test_file_params(self):
+        args, kwargs = self.render_mocked(JOIN_FORMAT_FILE)
+        self.assertEqual(args, (str(self.output_dir_path / 'output.m3u8'),))
+        self.assertIsNone(kwargs['codec'])
+        self.assertEqual(kwargs['ffmpeg_params'], [])
+
+    def test_fmp4_params(self):
+        args, kwargs = self.render_mocked(
+            JOIN_FORMAT_FMP4, ffmpeg_params=['-crf', '20']
+        )
+        self.assertEqual(kwargs['codec'], 'libx264')
+        self.assertEqual(kwargs['audio_codec'], 'aac')
+        ffmpeg_params = kwargs['ffmpeg_params']
+        self.assertEqual(
+            ffmpeg_params[:4], ['-crf', '20', '-force_key_frames', '12.000']
+        )
+        self.assertIn('-sc_threshold', ffmpeg_params)
+        self.assertIn(
+            'frag_keyframe+empty_moov+default_base_moof', ffmpeg_params
+        )
+
+    def test_hls_params(self):
+        args, kwargs = self.render_mocked(JOIN_FORMAT_HLS)
+        self.assertEqual(
+            args, (str(self.output_dir_path / 'output%05d.ts'),)
+        )
+        self.assertEqual(kwargs['codec'], 'libx264')
+        self.assertEqual(
+            kwargs['ffmpeg_params'],
+            [
+                '-force_key_frames',
+                '12.000',
+                '-f',
+                'segment',
+                '-segment_format',
+                'mpegts',
+                '-segment_list',
+                str(self.output_dir_path / 'output.m3u8'),
+                '-segment_list_type',
+                'm3u8',
+                '-segment_times',
+                '12.000',
+            ],
+        )
+
+    def test_hls_params_single_clip(self):
+        args, kwargs = self.render_mocked(JOIN_FORMAT_HLS, durations=(12,))
+        self.assertEqual(
+            kwargs['ffmpeg_params'],
+            [
+                '-f',
+                'segment',
+                '-segment_format',
+                'mpegts',
+                '-segment_list',
+                str(self.output_dir_path / 'output.m3u8'),
+                '-segment_list_type',
+                'm3u8',
+                '-segment_time',
+                str(HLS_SEGMENT_TIME_MAX),
+            ],
+        )
+
+    def test_segmented_codec_overrides_composition_codec(self):
+        args, kwargs = self.render_mocked(JOIN_FORMAT_HLS, codec='libvpx')
+        self.assertEqual(kwargs['codec'], 'libx264')
+
+    def render_fmp4(self, segment_duration: float) -> bytes:
+        clips = [self.make_clip(duration) for duration in (12, 3)]
+        composition = Composition(
+            clips=clips,
+            fps=10,
+            join_format=JOIN_FORMAT_FMP4,
+            segment_duration=segment_duration,
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file_path = Path(temp_dir) / 'output.mp4'
+            composition.render_joined(output_file_path)
+            return output_file_path.read_bytes()
+
+    def test_fmp4_fragment_per_clip(self):
+        output = self.render_fmp4(segment_duration=0)
+        self.assertEqual(output.count(b'moof'), 2)
+
+    def test_fmp4_fragments_split_long_clips(self):
+        output = self.render_fmp4(segment_duration=5)
+        self.assertEqual(output.count(b'moof'), 4)
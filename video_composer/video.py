@@ -4,11 +4,15 @@ from pathlib import Path
 from typing import Iterable, Optional, Sequence
 
 from moviepy.editor import (
-    CompositeVideoClip, TextClip, VideoFileClip, concatenate_videoclips,
+    CompositeVideoClip, TextClip, VideoClip, VideoFileClip,
+    concatenate_videoclips,
 )
 from moviepy.video.tools.subtitles import SubtitlesClip
 
-from video_composer.meta import ClipMeta, Size
+from video_composer.frames import (
+    Crop, FadeOut, FramePipeline, Resize, Speed, Transform,
+)
+from video_composer.meta import ClipMeta, CompositionError, Size
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,57 @@ DEFAULT_SUBTITLE_COLOR = 'white'
 
 INTERTITLE_TEXT_WIDTH_FACTOR = 0.8
 
+JOIN_FORMAT_FILE = 'file'
+JOIN_FORMAT_FMP4 = 'fmp4'
+JOIN_FORMAT_HLS = 'hls'
+JOIN_FORMATS = (JOIN_FORMAT_FILE, JOIN_FORMAT_FMP4, JOIN_FORMAT_HLS)
+DEFAULT_JOIN_FORMAT = JOIN_FORMAT_FILE
+DEFAULT_SEGMENT_DURATION = 6
+# Don't split off a trailing segment shorter than this fraction of the
+# segment duration, append it to the previous segment instead.
+MIN_SEGMENT_FRACTION = 0.25
+
+JOIN_FORMAT_SUFFIXES = {JOIN_FORMAT_FMP4: '.mp4', JOIN_FORMAT_HLS: '.m3u8'}
+SEGMENTED_CODEC = 'libx264'
+# Large enough to never be reached, so that the encoder doesn't insert
+# keyframes of its own and fragments start only at the forced keyframes.
+FMP4_GOP_SIZE = 2**30
+HLS_SEGMENT_SUFFIX = '.ts'
+# Segment length in seconds long enough to never be reached, so that the
+# segment muxer doesn't fall back to its default 2 s segments when there are
+# no segment times.
+HLS_SEGMENT_TIME_MAX = 2**30
+
+
+def get_segment_times(
+    durations: Iterable[float], segment_duration: float = 0
+) -> list[float]:
+    """Return times at which to split joined clips into segments.
+
+    Every clip starts a new segment. When segment_duration is set, clips
+    longer than it are split further every segment_duration seconds, counted
+    from the start of the clip, except when the rest of the clip would be
+    shorter than MIN_SEGMENT_FRACTION of segment_duration. The start of the
+    video is not included.
+    """
+    times = []
+    clip_start: float = 0
+    for duration in durations:
+        if clip_start > 0:
+            times.append(round(clip_start, 3))
+        if segment_duration > 0:
+            offset = segment_duration
+            min_segment_duration = segment_duration * MIN_SEGMENT_FRACTION
+            while duration - offset >= min_segment_duration:
+                times.append(round(clip_start + offset, 3))
+                offset += segment_duration
+        clip_start += duration
+    return times
+
+
+def format_times(times: Sequence[float]) -> str:
+    return ','.join(f'{t:.3f}' for t in times)
+
 
 class Clip:
     _cache: dict[Path, VideoFileClip] = {}
@@ -36,7 +91,64 @@ class Clip:
         self.meta = meta
         if meta.path not in Clip._cache:
             Clip._cache[meta.path] = VideoFileClip(str(meta.path))
-        self.video_file_clip = Clip._cache[meta.path]
+        self._video_file_clip = Clip._cache[meta.path]
+        self._pipeline: Optional[FramePipeline] = None
+
+    @property
+    def video_file_clip(self) -> VideoFileClip:
+        self._apply_transforms()
+        return self._video_file_clip
+
+    @video_file_clip.setter
+    def video_file_clip(self, video_file_clip: VideoFileClip):
+        self._video_file_clip = video_file_clip
+
+    def _add_transform(self, transform: Transform):
+        """Add a transform to be applied in a single pass with the others.
+
+        Crop, resize, fade-out and speed change are not applied as separate
+        MoviePy effects but collected in a FramePipeline, which is turned
+        into one MoviePy clip on the first access to video_file_clip.
+        """
+        if self._pipeline is None:
+            self._pipeline = FramePipeline(
+                self._video_file_clip.get_frame,
+                duration=self._video_file_clip.duration,
+                size=(self._video_file_clip.w, self._video_file_clip.h),
+            )
+        self._pipeline.add(transform)
+
+    def _apply_transforms(self):
+        if self._pipeline is None:
+            return
+        pipeline = self._pipeline
+        self._pipeline = None
+        source = self._video_file_clip
+        video_clip = VideoClip(pipeline.get_frame, duration=pipeline.duration)
+        video_clip.fps = source.fps
+        if source.audio is not None:
+            video_clip.audio = source.audio.fl_time(
+                pipeline.get_time
+            ).set_duration(pipeline.duration)
+        if source.mask is not None:
+            video_clip.mask = VideoClip(
+                pipeline.for_mask(source.mask.get_frame).get_frame,
+                ismask=True,
+                duration=pipeline.duration,
+            )
+        self._video_file_clip = video_clip
+
+    @property
+    def duration(self) -> float:
+        if self._pipeline is not None:
+            return self._pipeline.duration
+        return self._video_file_clip.duration
+
+    @property
+    def size(self) -> tuple[int, int]:
+        if self._pipeline is not None:
+            return self._pipeline.size
+        return self._video_file_clip.w, self._video_file_clip.h
 
     def cut(self):
         if self.meta.start is not None and self.meta.end is not None:
@@ -54,8 +166,7 @@ class Clip:
         self.video_file_clip = self.video_file_clip.set_fps(self.video_fps)
 
     def resize(self, width: int, height: int):
-        current_width = self.video_file_clip.w
-        current_height = self.video_file_clip.h
+        current_width, current_height = self.size
         current_aspect_ratio = current_width / current_height
         new_aspect_ratio = width / height
         if current_width == width and current_height == height:
@@ -85,9 +196,6 @@ class Clip:
             new_height,
             new_aspect_ratio,
         )
-        self.video_file_clip = self.video_file_clip.resize(
-            (new_width, new_height)
-        )
 
         if crop_x > 0 or crop_y > 0:
             logger.info(
@@ -96,8 +204,21 @@ class Clip:
                 crop_x,
                 crop_y,
             )
-            self.video_file_clip = self.video_file_clip.crop(
-                x1=crop_x, y1=crop_y, width=width, height=height
+            # Crop before resizing so that only the visible part of the
+            # frame gets resized.
+            scale_x = current_width / new_width
+            scale_y = current_height / new_height
+            crop_width = min(round(width * scale_x), current_width)
+            crop_height = min(round(height * scale_y), current_height)
+            x1 = min(round(crop_x * scale_x), current_width - crop_width)
+            y1 = min(round(crop_y * scale_y), current_height - crop_height)
+            self._add_transform(
+                Crop(x1=x1, y1=y1, width=crop_width, height=crop_height)
+            )
+            self._add_transform(Resize(width=width, height=height))
+        else:
+            self._add_transform(
+                Resize(width=round(new_width), height=round(new_height))
             )
 
     def add_subtitles(
@@ -154,10 +275,12 @@ class Clip:
         )
 
     def fadeout(self, duration: float):
-        self.video_file_clip = self.video_file_clip.fadeout(duration / 1000)
+        self._add_transform(
+            FadeOut(end=self.duration, duration=duration / 1000)
+        )
 
     def speed(self, factor: float):
-        self.video_file_clip = self.video_file_clip.speedx(factor=factor)
+        self._add_transform(Speed(factor=factor))
 
 
 @dataclass
@@ -168,6 +291,8 @@ class Composition:
     codec: Optional[str] = None
     ffmpeg_params: Sequence[str] = ()
     tags: Sequence[str] = ()
+    join_format: str = DEFAULT_JOIN_FORMAT
+    segment_duration: float = DEFAULT_SEGMENT_DURATION
 
     @classmethod
     def from_metas(cls, metas: Iterable[ClipMeta], **kwargs) -> 'Composition':
@@ -181,12 +306,17 @@ class Composition:
         return cls(clips=clips, **kwargs)
 
     def _render_video_file_clip(
-        self, video_file_clip: VideoFileClip, output_file_path: Path
+        self,
+        video_file_clip: VideoFileClip,
+        output_file_path: Path,
+        codec: Optional[str] = None,
+        ffmpeg_params: Sequence[str] = (),
     ):
+        codec = codec or self.codec
         kwargs: dict[str, str] = {}
         if (
-            self.codec == 'libx264'
-            or not self.codec
+            codec == 'libx264'
+            or not codec
             and output_file_path.suffix == '.mp4'
         ):
             kwargs['audio_codec'] = 'aac'
@@ -194,8 +324,8 @@ class Composition:
         video_file_clip.write_videofile(
             str(output_file_path),
             fps=self.fps,
-            codec=self.codec,
-            ffmpeg_params=self.ffmpeg_params,
+            codec=codec,
+            ffmpeg_params=[*self.ffmpeg_params, *ffmpeg_params],
             **kwargs,
         )
 
@@ -219,10 +349,66 @@ class Composition:
         if not self.video_file_clips:
             logger.warn('Nothing to do, the composition has no clips')
             return
-        self._render_video_file_clip(
-            concatenate_videoclips(self.video_file_clips),
-            output_file_path,
+        video_file_clip = concatenate_videoclips(self.video_file_clips)
+        if self.join_format == JOIN_FORMAT_FILE:
+            self._render_video_file_clip(video_file_clip, output_file_path)
+            return
+
+        segment_times = get_segment_times(
+            (clip.duration for clip in self.video_file_clips),
+            self.segment_duration,
         )
+        logger.info('Segment boundaries: %s', format_times(segment_times))
+        # Force keyframes at the segment boundaries so that fragments and
+        # segments start exactly where the clips start.
+        ffmpeg_params: list[str] = []
+        if segment_times:
+            ffmpeg_params += ['-force_key_frames', format_times(segment_times)]
+
+        if self.join_format == JOIN_FORMAT_FMP4:
+            ffmpeg_params += [
+                '-sc_threshold',
+                '0',
+                '-g',
+                str(FMP4_GOP_SIZE),
+                '-movflags',
+                'frag_keyframe+empty_moov+default_base_moof',
+            ]
+            self._render_video_file_clip(
+                video_file_clip,
+                output_file_path,
+                codec=SEGMENTED_CODEC,
+                ffmpeg_params=ffmpeg_params,
+            )
+        elif self.join_format == JOIN_FORMAT_HLS:
+            segment_file_path = output_file_path.with_name(
+                f'{output_file_path.stem}%05d{HLS_SEGMENT_SUFFIX}'
+            )
+            ffmpeg_params += [
+                '-f',
+                'segment',
+                '-segment_format',
+                'mpegts',
+                '-segment_list',
+                str(output_file_path),
+                '-segment_list_type',
+                'm3u8',
+            ]
+            if segment_times:
+                ffmpeg_params += [
+                    '-segment_times',
+                    format_times(segment_times),
+                ]
+            else:
+                ffmpeg_params += ['-segment_time', str(HLS_SEGMENT_TIME_MAX)]
+            self._render_video_file_clip(
+                video_file_clip,
+                segment_file_path,
+                codec=SEGMENTED_CODEC,
+                ffmpeg_params=ffmpeg_params,
+            )
+        else:
+            raise CompositionError(f'Unknown join format {self.join_format}')
 
     @property
     def video_file_clips(self) -> list[VideoFileClip]: